@@ -1,3 +1,4 @@
+import atexit
 import logging
 import os
 import sqlite3
@@ -7,45 +8,154 @@ from config import AppSettings
 
 logger = logging.getLogger(__name__)
 
+_SQL_CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS seen_pdfs (
+        hash BLOB PRIMARY KEY,
+        source_url TEXT NOT NULL,
+        first_seen_utc TIMESTAMP NOT NULL
+    )
+"""
+_SQL_EXISTS = "SELECT 1 FROM seen_pdfs WHERE hash = ?"
+_SQL_EXISTS_MANY = "SELECT hash FROM seen_pdfs WHERE hash IN ({placeholders})"
+_SQL_INSERT = "INSERT OR IGNORE INTO seen_pdfs (hash, source_url, first_seen_utc) VALUES (?, ?, ?)"
+
+# Opened once by setup_database() and reused for every query so each lookup is
+# a single bound-parameter execute against sqlite3's cached statements.
+_conn: sqlite3.Connection | None = None
+
+
+def _get_conn() -> sqlite3.Connection:
+    """Return the shared database connection.
+
+    Raises
+    ------
+        RuntimeError: If setup_database() has not been called yet.
+
+    """
+    if _conn is None:
+        msg = "Database not initialized. Call setup_database() first."
+        raise RuntimeError(msg)
+    return _conn
+
 
 def setup_database() -> None:
-    """Initialize the database and table if they don't already exist."""
+    """Initialize the database and table if they don't already exist.
+
+    Safe to call more than once; later calls reuse the open connection.
+    """
+    global _conn  # noqa: PLW0603
+
+    if _conn is not None:
+        return
+
     db_file = os.environ.get(AppSettings.DB_FILE.value, "ssa.db")
-    conn = sqlite3.connect(db_file)
-    cursor = conn.cursor()
+    _conn = sqlite3.connect(db_file, isolation_level=None)
+    atexit.register(_conn.close)
+
+    _conn.execute("PRAGMA journal_mode=WAL")
+    _conn.execute("PRAGMA synchronous=NORMAL")
+    _migrate_hex_hashes(_conn)
+
     # The 'hash' column is the PRIMARY KEY, which automatically creates an
-    # efficient index for fast lookups and ensures uniqueness.
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS seen_pdfs (
-            hash TEXT PRIMARY KEY,
-            source_url TEXT NOT NULL,
-            first_seen_utc TIMESTAMP NOT NULL
-        )
+    # efficient index for fast lookups and ensures uniqueness. Hashes are
+    # stored as raw 32 byte SHA-256 digests rather than 64 character hex.
+    _conn.execute(_SQL_CREATE_TABLE)
+
+
+def _migrate_hex_hashes(conn: sqlite3.Connection) -> None:
+    """Convert a seen_pdfs table with hex TEXT hashes to BLOB hashes.
+
+    Databases created before hashes were stored as raw digests have a
+    'hash TEXT' column. Rebuild the table with a BLOB key, decoding the
+    hex rows, so existing schedules keep matching. Does nothing if the
+    table is missing or already migrated.
+
+    Args:
+    ----
+        conn (sqlite3.Connection): Open connection to the database.
+
     """
-    )
-    conn.commit()
-    conn.close()
+    columns = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(seen_pdfs)")}
+    if columns.get("hash", "").upper() != "TEXT":
+        return
 
+    logger.info("Migrating seen_pdfs hashes from hex TEXT to BLOB...")
 
-def hash_exists(pdf_hash: str) -> bool:
+    conn.execute("BEGIN")
+    with conn:
+        conn.execute("ALTER TABLE seen_pdfs RENAME TO seen_pdfs_hex")
+        conn.execute(_SQL_CREATE_TABLE)
+        rows = conn.execute(
+            "SELECT hash, source_url, first_seen_utc FROM seen_pdfs_hex "
+            "ORDER BY first_seen_utc"
+        ).fetchall()
+        # Rows written after the switch to digests may already be BLOBs.
+        conn.executemany(
+            _SQL_INSERT,
+            [
+                (
+                    bytes.fromhex(pdf_hash) if isinstance(pdf_hash, str) else pdf_hash,
+                    pdf_url,
+                    first_seen,
+                )
+                for pdf_hash, pdf_url, first_seen in rows
+            ],
+        )
+        conn.execute("DROP TABLE seen_pdfs_hex")
+
+    # Reclaim the space freed by the old hex index.
+    conn.execute("VACUUM")
+    logger.info("Migrated %s seen_pdfs row(s).", len(rows))
+
+
+def hash_exists(pdf_hash: bytes) -> bool:
     """Check if a hash already exists in the SQLite database."""
-    conn = sqlite3.connect(AppSettings.DB_FILE.value)
-    cursor = conn.cursor()
-    cursor.execute("SELECT 1 FROM seen_pdfs WHERE hash = ?", (pdf_hash,))
-    exists = cursor.fetchone() is not None
-    conn.close()
-    return exists
+    return _get_conn().execute(_SQL_EXISTS, (pdf_hash,)).fetchone() is not None
 
 
-def add_hash(pdf_hash: str, pdf_url: str) -> None:
+def add_hash(pdf_hash: bytes, pdf_url: str) -> None:
     """Add a new PDF hash and its metadata to the SQLite database."""
-    conn = sqlite3.connect(AppSettings.DB_FILE.value)
-    cursor = conn.cursor()
     timestamp = datetime.now(tz=timezone.utc)
-    cursor.execute(
-        "INSERT OR IGNORE INTO seen_pdfs (hash, source_url, first_seen_utc) VALUES (?, ?, ?)",
-        (pdf_hash, pdf_url, timestamp),
-    )
-    conn.commit()
-    conn.close()
+    _get_conn().execute(_SQL_INSERT, (pdf_hash, pdf_url, timestamp))
+
+
+def existing_hashes(pdf_hashes: list[bytes]) -> set[bytes]:
+    """Return the subset of hashes that already exist in the SQLite database.
+
+    Args:
+    ----
+        pdf_hashes (list[bytes]): Hashes to look up.
+
+    Returns:
+    -------
+        set[bytes]: Hashes from pdf_hashes that are already stored.
+
+    """
+    if not pdf_hashes:
+        return set()
+
+    placeholders = ",".join("?" * len(pdf_hashes))
+    query = _SQL_EXISTS_MANY.format(placeholders=placeholders)
+    rows = _get_conn().execute(query, pdf_hashes).fetchall()
+    return {row[0] for row in rows}
+
+
+def add_hashes(records: list[tuple[bytes, str]]) -> None:
+    """Add several PDF hashes and their source URLs in a single transaction.
+
+    Args:
+    ----
+        records (list[tuple[bytes, str]]): (hash, source URL) pairs to insert.
+
+    """
+    if not records:
+        return
+
+    conn = _get_conn()
+    timestamp = datetime.now(tz=timezone.utc)
+    conn.execute("BEGIN")
+    with conn:
+        conn.executemany(
+            _SQL_INSERT,
+            [(pdf_hash, pdf_url, timestamp) for pdf_hash, pdf_url in records],
+        )
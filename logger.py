@@ -3,11 +3,18 @@ import sys
 
 
 def setup_logging() -> None:
-    """Configure logging to output to both the console and a file."""
+    """Configure logging to output to both the console and a file.
+
+    Safe to call more than once; later calls leave existing handlers alone.
+    """
     # Get the root logger
     logger = logging.getLogger()
     logger.setLevel(logging.DEBUG)
 
+    # Already configured, don't build a handler just to throw it away
+    if logger.handlers:
+        return
+
     # Console logger
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO)
@@ -16,5 +23,4 @@ def setup_logging() -> None:
     console_formatter = logging.Formatter("%(levelname)s: %(message)s")
     console_handler.setFormatter(console_formatter)
 
-    if not logger.handlers:
-        logger.addHandler(console_handler)
+    logger.addHandler(console_handler)
@@ -1,55 +1,83 @@
+import asyncio
+import hashlib
 import logging
 import os
 import re
 import uuid
-from typing import Any
+from collections.abc import Mapping
+from functools import lru_cache
+from types import MappingProxyType
 from urllib.parse import urljoin, urlparse
 
 import httpx
-from bs4 import BeautifulSoup, Tag
-from dotenv import load_dotenv
-from fake_useragent import UserAgent
+from selectolax.lexbor import LexborHTMLParser
 
 from config import AppSettings
-from database import add_hash, hash_exists, setup_database
+from database import add_hashes, existing_hashes, setup_database
 from logger import setup_logging
-from utils import get_pdf_hash
 
 logger = logging.getLogger(__name__)
 
+MAX_CONCURRENT_DOWNLOADS = 4
+DOWNLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
 
-SCHEDULE_72HR_REGEX = [re.compile(r"72hr", re.IGNORECASE)]
+# Matches links whose path (everything before any query string or fragment)
+# contains "72hr" and ends in ".pdf". Meant for re.match: the possessive
+# quantifier and lookbehind keep it from backtracking, so matching is linear
+# in the length of the link.
+PDF_72HR_REGEX = re.compile(
+    r"(?=[^?#]*?72hr)[^?#]*+(?<=\.pdf)(?:[?#]|$)", re.IGNORECASE
+)
 
-HEADERS = {
-    "User-Agent": UserAgent().chrome,
-    "Accept": "application/pdf,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
-    "Accept-Encoding": "gzip, deflate, br, zstd",
-    "Accept-Language": "en-US,en;q=0.9",
-    "Connection": "keep-alive",
-}
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
 
+# Accept-Encoding is left to httpx, which only advertises the encodings it has
+# decoders installed for (br and zstd come from the brotli and zstd extras).
+HEADERS: Mapping[str, str] = MappingProxyType(
+    {
+        "User-Agent": USER_AGENT,
+        "Accept": "application/pdf,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
+        "Accept-Language": "en-US,en;q=0.9",
+        "Connection": "keep-alive",
+    }
+)
 
-def get_pdf_links(url: str, **kwargs: Any) -> list[str]:
-    """Get all PDFs URLs on the page.
+
+@lru_cache
+def headers_for(host: str) -> Mapping[str, str]:
+    """Return the request headers to use for a host.
+
+    Args:
+    ----
+        host (str): Hostname the requests are sent to.
+
+    Returns:
+    -------
+        Mapping[str, str]: Read-only HEADERS with the host's Referer added.
+
+    """
+    return MappingProxyType({**HEADERS, "Referer": f"https://{host}"})
+
+
+async def get_pdf_links(client: httpx.AsyncClient, url: str) -> list[str]:
+    """Get all 72 hour schedule PDF URLs on the page.
 
     Args:
     ----
+        client (httpx.AsyncClient): Shared client used to make the request.
         url (str): The URL to scrape.
-        kwargs (Any)): Additional keyword arguements.
-        headers (dict[str, Any]): Headers to include in request to URL.
 
     Returns:
     -------
-        list[str]: List of PDF links found on the page.
+        list[str]: List of 72 hour schedule PDF links found on the page.
 
     """
-    logger.info("Attempting to scrape PDF links from: %s", url)
+    logger.info("Attempting to scrape 72HR PDF links from: %s", url)
     pdf_links: list[str] = []
-    logger.info("using headers: %s", kwargs["headers"])
 
     try:
         # Fetch the web page
-        response = httpx.get(url, **kwargs)
+        response = await client.get(url)
         response.raise_for_status()
 
         logger.info(
@@ -57,26 +85,20 @@ def get_pdf_links(url: str, **kwargs: Any) -> list[str]:
         )
 
         # Parse response
-        soup = BeautifulSoup(response.text, "html.parser")
+        tree = LexborHTMLParser(response.content)
 
-        # Find all 'a' tags that have an 'href' attribute.
-        for link in soup.find_all("a", href=True):
+        # Find all 'a' tags whose 'href' points to a 72 hour schedule PDF.
+        for link in tree.css("a[href]"):
+            href = link.attributes.get("href")
 
-            if not isinstance(link, Tag):
+            if not href or not PDF_72HR_REGEX.match(href):
                 continue
 
-            href = link.get("href")
-
-            if not isinstance(href, str):
-                continue
+            absolute_url = urljoin(url, href)
+            pdf_links.append(absolute_url)
+            logger.debug("Found 72HR PDF at: %s", absolute_url)
 
-            path = urlparse(href).path
-            if path.endswith(".pdf"):
-                absolute_url = urljoin(url, href)
-                pdf_links.append(absolute_url)
-                logger.debug("Found PDF at: %s", absolute_url)
-
-        logger.info("Found %s PDF link(s) on: %s", len(pdf_links), url)
+        logger.info("Found %s 72HR PDF link(s) on: %s", len(pdf_links), url)
 
     except httpx.RequestError as e:
         logger.error("An error occurred while requesting '%s'.", e.request.url)
@@ -96,39 +118,41 @@ def get_pdf_links(url: str, **kwargs: Any) -> list[str]:
     return pdf_links
 
 
-def download_pdf(url: str, save_path: str, **kwargs: Any) -> str | None:
+async def download_pdf(
+    client: httpx.AsyncClient,
+    url: str,
+    save_path: str,
+) -> tuple[str, bytes] | None:
     """Download PDF to local filesystem.
 
     Args:
     ----
+        client (httpx.AsyncClient): Shared client used to make the request.
         url (str): URL to PDF.
         save_path (str): Local file path to save PDF.
-        kwargs (dict[str, Any]): Additional keyword arguements.
-        headers (dict[str, Any]): Headers to include in request to URL.
 
     Returns:
     -------
-        str | None: Path of downloaded file.
+        tuple[str, bytes] | None: Path of downloaded file and SHA-256 digest of
+            its content.
 
     """
     logger.info("Starting download of PDF from: %s", url)
-    logger.info("using headers: %s", kwargs["headers"])
 
     try:
-        with httpx.stream(
-            "GET", url, follow_redirects=True, timeout=30.0, **kwargs
-        ) as response:
+        async with client.stream("GET", url, follow_redirects=True) as response:
             response.raise_for_status()
 
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-
-            # Save PDF
+            # Save and hash PDF in one pass. Writes run in a worker thread so
+            # they don't block the other downloads.
+            pdf_hash = hashlib.sha256()
             with open(save_path, "wb") as f:
-                for chunk in response.iter_bytes(chunk_size=8192):
-                    f.write(chunk)
+                async for chunk in response.aiter_bytes(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    pdf_hash.update(chunk)
+                    await asyncio.to_thread(f.write, chunk)
 
             logger.info("Successfully saved PDF to: %s", save_path)
-            return save_path
+            return save_path, pdf_hash.digest()
 
     except httpx.RequestError as e:
         logger.error("An error occurred while downloading PDF: %s", e.request.url)
@@ -151,23 +175,91 @@ def download_pdf(url: str, save_path: str, **kwargs: Any) -> str | None:
         return None
 
 
-def filter_list(data: list[str], patterns: list[re.Pattern[str]]) -> list[str]:
-    """Return list of strings that match any of the patterns in filters.
+async def download_pdfs(
+    client: httpx.AsyncClient, urls: list[str]
+) -> list[tuple[str, bytes] | None]:
+    """Download PDFs concurrently over a shared connection pool.
 
     Args:
     ----
-        data (list[str]): List of strings to filter.
-        patterns (list[re.Pattern[str]]): List of compiled string regex patterns.
+        client (httpx.AsyncClient): Shared client used to make the requests.
+        urls (list[str]): URLs to PDFs.
 
     Returns:
     -------
-        list[str]: List of strings that match any of the patterns.
+        list[tuple[str, bytes] | None]: Path and SHA-256 digest of each downloaded file,
+            in the same order as urls.
 
     """
-    return [text for text in data if any(pattern.search(text) for pattern in patterns)]
+    queue: asyncio.Queue[tuple[int, str]] = asyncio.Queue()
+    for index, url in enumerate(urls):
+        queue.put_nowait((index, url))
+
+    pdf_results: list[tuple[str, bytes] | None] = [None] * len(urls)
+
+    async def worker() -> None:
+        # Pull the next URL as soon as the previous download finishes so a
+        # single slow server only ties up one worker.
+        while True:
+            index, url = await queue.get()
+            try:
+                pdf_results[index] = await download_pdf(
+                    client, url, f"{AppSettings.DOWNLOAD_DIR.value}/{uuid.uuid4()}.pdf"
+                )
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(MAX_CONCURRENT_DOWNLOADS)]
+    await queue.join()
+
+    for task in workers:
+        task.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+
+    return pdf_results
+
+
+async def scrape_72hr_pdfs(url: str) -> list[tuple[bytes, str]]:
+    """Download every 72 hour schedule PDF linked from the page.
+
+    The page and all of its PDFs are fetched through one client so they
+    share a single connection pool.
+
+    Args:
+    ----
+        url (str): The URL to scrape.
+
+    Returns:
+    -------
+        list[tuple[bytes, str]]: SHA-256 digest and source URL of each downloaded PDF.
+
+    """
+    headers = headers_for(urlparse(url).hostname or "")
+    limits = httpx.Limits(
+        max_keepalive_connections=MAX_CONCURRENT_DOWNLOADS,
+        max_connections=MAX_CONCURRENT_DOWNLOADS,
+    )
+
+    async with httpx.AsyncClient(
+        headers=headers, http2=True, timeout=30.0, limits=limits
+    ) as client:
+        pdf_links = await get_pdf_links(client, url)
+        pdf_results = await download_pdfs(client, pdf_links)
+
+    pdf_records: list[tuple[bytes, str]] = []
+    for pdf_result, pdf_url in zip(pdf_results, pdf_links, strict=True):
+        if not pdf_result:
+            continue
+
+        _, pdf_hash = pdf_result
+        pdf_records.append((pdf_hash, pdf_url))
+
+    return pdf_records
 
 
 if __name__ == "__main__":
+    from dotenv import load_dotenv
+
     # App startup sequence
     setup_logging()
 
@@ -180,32 +272,20 @@ if __name__ == "__main__":
 
     # Scrape
     target_url = "https://www.amc.af.mil/AMC-Travel-Site/Terminals/CONUS-Terminals/Baltimore-Washington-International-Airport-Passenger-Terminal/"
-    HEADERS["Referer"] = f"https://{urlparse(target_url).hostname}"
-
-    pdf_links = get_pdf_links(target_url, headers=HEADERS)
-    pdf_72hr_links = filter_list(pdf_links, SCHEDULE_72HR_REGEX)
 
-    pdfs_72hrs = [
-        download_pdf(
-            pdf_link,
-            f"{AppSettings.DOWNLOAD_DIR.value}/{uuid.uuid4()}.pdf",
-            headers=HEADERS,
-        )
-        for pdf_link in pdf_72hr_links
-    ]
+    pdf_records = asyncio.run(scrape_72hr_pdfs(target_url))
 
     # Store PDFs
-    for pdf_path, pdf_url in zip(pdfs_72hrs, pdf_72hr_links, strict=True):
-        if not pdf_path:
+    seen_hashes = existing_hashes([pdf_hash for pdf_hash, _ in pdf_records])
+    new_records: list[tuple[bytes, str]] = []
+    for pdf_hash, pdf_url in pdf_records:
+        if pdf_hash in seen_hashes:
+            logger.info("72HR schedule seen before. Hash: %s", pdf_hash.hex())
             continue
 
-        with open(pdf_path, mode="rb") as file:
-            pdf_bytes = file.read()
-
-        pdf_hash = get_pdf_hash(pdf_bytes)
+        # Guard against the same PDF showing up twice in one run
+        seen_hashes.add(pdf_hash)
+        new_records.append((pdf_hash, pdf_url))
+        logger.info("New 72HR schedule PDF found! Saving to database...")
 
-        if not hash_exists(pdf_hash):
-            add_hash(pdf_hash, pdf_url)
-            logger.info("New 72HR schedule PDF found! Saving to database...")
-        else:
-            logger.info("72HR schedule seen before. Hash: %s", pdf_hash)
+    add_hashes(new_records)